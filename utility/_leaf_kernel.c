@@ -0,0 +1,84 @@
+/*
+ * _leaf_kernel.c — AVX2-ядро листового умножения для matrix_benchmark.py.
+ *
+ * Элементы бенчмарка малы ([-9, 9], после блочных сумм Штрассена —
+ * десятки), поэтому лист можно считать в int16 с int32-аккумулятором:
+ * vpmaddwd (_mm256_madd_epi16) выполняет 16 умножений int16 и попарные
+ * суммы в int32 за одну инструкцию — вдвое плотнее по полосам, чем
+ * int64-путь, и с вдвое меньшим трафиком памяти.
+ *
+ * B передаётся транспонированной (Bt): скалярное произведение строки A
+ * и строки Bt идёт по смежной памяти. Точность проверяет вызывающая
+ * сторона (произведения и суммы обязаны умещаться в int32).
+ *
+ * Сборка (библиотека кладётся рядом с исходником; Python-обёртка
+ * делает это сама при первом запуске, если найден компилятор):
+ *   cc -O3 -march=native -shared -fPIC -o _leaf_kernel.so _leaf_kernel.c
+ */
+#include <stdint.h>
+#include <stddef.h>
+
+#ifdef __AVX2__
+#include <immintrin.h>
+#endif
+
+/*
+ * C = A·B для квадратных n×n float32 (строчная укладка).
+ *
+ * ikj-порядок: строка C накапливается FMA-векторами по 8 float за
+ * инструкцию, элемент A транслируется на весь регистр. Предназначено
+ * для float32-листа на сборках NumPy без BLAS; против OpenBLAS sgemm
+ * ручное ядро не выигрывает (см. USE_C_SGEMM в matrix_benchmark.py).
+ */
+void sgemm_leaf(const float *A, const float *B, float *C, int n)
+{
+    for (int i = 0; i < n; i++) {
+        float *c = C + (size_t)i * n;
+        const float *a = A + (size_t)i * n;
+        for (int j = 0; j < n; j++)
+            c[j] = 0.0f;
+        for (int k = 0; k < n; k++) {
+            const float *b = B + (size_t)k * n;
+            int j = 0;
+#if defined(__AVX2__) && defined(__FMA__)
+            __m256 va = _mm256_set1_ps(a[k]);
+            for (; j + 8 <= n; j += 8) {
+                __m256 vc = _mm256_loadu_ps(c + j);
+                vc = _mm256_fmadd_ps(va, _mm256_loadu_ps(b + j), vc);
+                _mm256_storeu_ps(c + j, vc);
+            }
+#endif
+            for (; j < n; j++)
+                c[j] += a[k] * b[j];
+        }
+    }
+}
+
+void leaf_matmul_i16(const int16_t *A, const int16_t *Bt, int32_t *C, int n)
+{
+    for (int i = 0; i < n; i++) {
+        const int16_t *a = A + (size_t)i * n;
+        for (int j = 0; j < n; j++) {
+            const int16_t *b = Bt + (size_t)j * n;
+            int32_t acc = 0;
+            int k = 0;
+#ifdef __AVX2__
+            __m256i vacc = _mm256_setzero_si256();
+            for (; k + 16 <= n; k += 16) {
+                __m256i va = _mm256_loadu_si256((const __m256i *)(a + k));
+                __m256i vb = _mm256_loadu_si256((const __m256i *)(b + k));
+                vacc = _mm256_add_epi32(vacc, _mm256_madd_epi16(va, vb));
+            }
+            __m128i lo = _mm256_castsi256_si128(vacc);
+            __m128i hi = _mm256_extracti128_si256(vacc, 1);
+            __m128i s = _mm_add_epi32(lo, hi);
+            s = _mm_hadd_epi32(s, s);
+            s = _mm_hadd_epi32(s, s);
+            acc = _mm_cvtsi128_si32(s);
+#endif
+            for (; k < n; k++)
+                acc += (int32_t)a[k] * b[k];
+            C[(size_t)i * n + j] = acc;
+        }
+    }
+}
@@ -0,0 +1,25 @@
+# cython: boundscheck=False, wraparound=False, cdivision=True, language_level=3
+"""
+_matmul_cython.pyx — скомпилированное ядро классического умножения
+для answer.py.
+
+Тот же ikj-цикл, что и в matmul_classic, но по типизированным
+memoryview над плоскими int64-буферами (array.array('q') или ndarray):
+Cython генерирует обычные C-циклы без обращений к интерпретатору,
+которые компилятор затем автовекторизует.
+
+Сборка:
+    python setup.py build_ext --inplace
+"""
+
+
+def matmul_flat(long long[::1] A, long long[::1] B, long long[::1] C,
+                Py_ssize_t n):
+    """C += A·B для квадратных n×n матриц, развёрнутых по строкам."""
+    cdef Py_ssize_t i, j, k
+    cdef long long a
+    for i in range(n):
+        for k in range(n):
+            a = A[i * n + k]
+            for j in range(n):
+                C[i * n + j] += a * B[k * n + j]
@@ -1,12 +1,26 @@
+from array import array
+
+try:
+    # Скомпилированное Cython-ядро (см. _matmul_cython.pyx, сборка —
+    # python setup.py build_ext --inplace); без него работаем по чистому Python
+    from _matmul_cython import matmul_flat as _matmul_flat
+except ImportError:
+    _matmul_flat = None
+
+
 def read_matrix(n):
-    # Читаем квадратную матрицу n×n из стандартного ввода
-    return [list(map(int, input().split())) for _ in range(n)]
+    # Читаем квадратную матрицу n×n из стандартного ввода.
+    # Строки храним в array('q'): 8-байтовые C-целые вместо 28-байтовых
+    # PyObject — в 3-4 раза меньше памяти, строка лежит в памяти подряд.
+    # Индексация и срезы работают как у списков, так что алгоритмы ниже
+    # не меняются.
+    return [array('q', map(int, input().split())) for _ in range(n)]
 
 
 def matmul_classic(A, B):
     # Классическое умножение матриц O(n^3) с тройным циклом
     n = len(A)
-    C = [[0] * n for _ in range(n)]
+    C = [array('q', bytes(8 * n)) for _ in range(n)]  # строки нулей
     for i in range(n):
         rowA = A[i]
         rowC = C[i]
@@ -21,13 +35,13 @@ def matmul_classic(A, B):
 def add_matrix(A, B):
     # Поэлементная сумма двух квадратных матриц одного размера
     n = len(A)
-    return [[A[i][j] + B[i][j] for j in range(n)] for i in range(n)]
+    return [array('q', (A[i][j] + B[i][j] for j in range(n))) for i in range(n)]
 
 
 def sub_matrix(A, B):
     # Поэлементная разность двух квадратных матриц одного размера
     n = len(A)
-    return [[A[i][j] - B[i][j] for j in range(n)] for i in range(n)]
+    return [array('q', (A[i][j] - B[i][j] for j in range(n))) for i in range(n)]
 
 
 def strassen_core(A, B, cutoff):
@@ -104,14 +118,29 @@ def matmul_strassen(A, B, cutoff=64):
     return strassen_core(A, B, cutoff)
 
 
+def matmul_classic_compiled(A, B):
+    # Классическое умножение через Cython-ядро: матрицы разворачиваются
+    # в плоские int64-буферы array('q'), тройной цикл выполняется в C
+    n = len(A)
+    a = array('q', (x for row in A for x in row))
+    b = array('q', (x for row in B for x in row))
+    c = array('q', bytes(8 * n * n))  # нули
+    _matmul_flat(a, b, c, n)
+    return [list(c[i * n:(i + 1) * n]) for i in range(n)]
+
+
 def main():
     # Чтение входных данных
     n = int(input())
     A = read_matrix(n)
     B = read_matrix(n)
 
-    # Умножение матриц гибридным алгоритмом Штрассена
-    C = matmul_strassen(A, B, cutoff=64)
+    # Умножение матриц: скомпилированное ядро, если оно собрано,
+    # иначе — гибридный алгоритм Штрассена на чистом Python
+    if _matmul_flat is not None:
+        C = matmul_classic_compiled(A, B)
+    else:
+        C = matmul_strassen(A, B, cutoff=64)
 
     # Вывод результата
     for row in C:
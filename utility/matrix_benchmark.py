@@ -1,309 +1,1032 @@
-"""
-matrix_benchmark.py
-
-Бенчмарк умножения квадратных матриц тремя способами:
-
-1) Классический тройной цикл (O(n^3)) — базовый эталон.
-
-2) Чистый Python: алгоритм Штрассена
-   (7 рекурсивных умножений вместо 8,
-   ~18 блочных сложений/вычитаний на уровень рекурсии).
-
-3) Чистый Python: вариант Штрассена–Винограда
-   (та же асимптотика, но меньше блочных сложений/вычитаний —
-   порядка 15 вместо ~18 на каждый уровень рекурсии).
-
-Скрипт:
-- генерирует матрицы A, B размерности N с элементами в [-9, 9];
-- измеряет только время одной операции умножения (без генерации/проверок);
-- считает статистики по NUM_REPEATS прогонкам;
-- проверяет корректность Штрассена и Штрассена–Винограда,
-  сравнивая результат с классическим O(n^3) алгоритмом (один раз, вне тайминга).
-"""
-
-from __future__ import annotations
-
-import gc
-import random
-import statistics
-import time
-from typing import List, Tuple, Callable
-
-# =======================
-# Константы эксперимента
-# =======================
-
-# Размерность матриц
-N: int = 384
-
-# Если True — на каждом повторе генерируются новые матрицы (случайные, но детерминированные через RANDOM_SEED).
-# Если False — генерируются один раз и переиспользуются во всех повторах.
-IS_RANDOM: bool = False
-
-# Сколько раз повторять измерение (усреднение)
-NUM_REPEATS: int = 1
-
-# Базовый сид для генерации
-RANDOM_SEED: int = 42
-
-# Пороги переключения на обычный тройной цикл внутри рекурсивных алгоритмов
-CUTOFF_STRASSEN: int = 64
-CUTOFF_WINOGRAD: int = 64
-
-
-# =======================
-# Вспомогательные функции
-# =======================
-
-Matrix = List[List[int]]
-
-
-def generate_matrix(n: int, seed: int) -> Matrix:
-    """Сгенерировать n×n матрицу с целыми элементами в диапазоне [-9, 9]."""
-    rng = random.Random(seed)
-    return [[rng.randint(-9, 9) for _ in range(n)] for _ in range(n)]
-
-
-def matmul_classic(A: Matrix, B: Matrix) -> Matrix:
-    """
-    Классический тройной цикл (ikj-порядок) — базовый O(n^3) алгоритм.
-
-    Используется:
-    - как эталон для проверки корректности,
-    - как отдельный алгоритм для сравнения по времени.
-    """
-    n = len(A)
-    C = [[0] * n for _ in range(n)]
-    for i in range(n):
-        rowA = A[i]
-        Ci = C[i]
-        for k in range(n):
-            aik = rowA[k]
-            Bk = B[k]
-            for j in range(n):
-                Ci[j] += aik * Bk[j]
-    return C
-
-
-def add_matrix(A: Matrix, B: Matrix) -> Matrix:
-    n = len(A)
-    return [[A[i][j] + B[i][j] for j in range(n)] for i in range(n)]
-
-
-def sub_matrix(A: Matrix, B: Matrix) -> Matrix:
-    n = len(A)
-    return [[A[i][j] - B[i][j] for j in range(n)] for i in range(n)]
-
-
-# =======================
-# Алгоритм Штрассена
-# =======================
-
-def _strassen_core(A: Matrix, B: Matrix, cutoff: int) -> Matrix:
-    n = len(A)
-    if n <= cutoff:
-        return matmul_classic(A, B)
-
-    m = n // 2
-
-    a11 = [row[:m] for row in A[:m]]
-    a12 = [row[m:] for row in A[:m]]
-    a21 = [row[:m] for row in A[m:]]
-    a22 = [row[m:] for row in A[m:]]
-
-    b11 = [row[:m] for row in B[:m]]
-    b12 = [row[m:] for row in B[:m]]
-    b21 = [row[:m] for row in B[m:]]
-    b22 = [row[m:] for row in B[m:]]
-
-    # 7 рекурсивных умножений (M1..M7)
-    M1 = _strassen_core(add_matrix(a11, a22), add_matrix(b11, b22), cutoff)
-    M2 = _strassen_core(add_matrix(a21, a22), b11, cutoff)
-    M3 = _strassen_core(a11, sub_matrix(b12, b22), cutoff)
-    M4 = _strassen_core(a22, sub_matrix(b21, b11), cutoff)
-    M5 = _strassen_core(add_matrix(a11, a12), b22, cutoff)
-    M6 = _strassen_core(sub_matrix(a21, a11), add_matrix(b11, b12), cutoff)
-    M7 = _strassen_core(sub_matrix(a12, a22), add_matrix(b21, b22), cutoff)
-
-    # Комбинация в блоки C11..C22 (классические формулы Штрассена)
-    c11 = sub_matrix(add_matrix(add_matrix(M1, M4), M7), M5)
-    c12 = add_matrix(M3, M5)
-    c21 = add_matrix(M2, M4)
-    c22 = add_matrix(sub_matrix(add_matrix(M1, M3), M2), M6)
-
-    # Склейка блоков
-    C = [c11[i] + c12[i] for i in range(m)] + [c21[i] + c22[i] for i in range(m)]
-    return C
-
-
-def matmul_strassen(A: Matrix, B: Matrix, cutoff: int = CUTOFF_STRASSEN) -> Matrix:
-    """Умножение матриц методом Штрассена, поддерживает произвольное n (через доп. нули)."""
-    n = len(A)
-    if n == 0:
-        return []
-    assert n == len(B) == len(A[0]) == len(B[0]), "Матрицы должны быть квадратными и одинакового размера"
-
-    # Если n не степень двойки — дополняем нулями до ближайшей степени двойки
-    if n & (n - 1):
-        m = 1 << (n - 1).bit_length()
-        Ap = [row + [0] * (m - n) for row in A] + [[0] * m for _ in range(m - n)]
-        Bp = [row + [0] * (m - n) for row in B] + [[0] * m for _ in range(m - n)]
-        Cp = _strassen_core(Ap, Bp, cutoff)
-        return [row[:n] for row in Cp[:n]]
-    else:
-        return _strassen_core(A, B, cutoff)
-
-
-# =======================
-# Алгоритм Штрассена–Винограда
-# (формулы с S1..S10, P1..P7)
-# =======================
-
-def _strassen_winograd_core(A: Matrix, B: Matrix, cutoff: int) -> Matrix:
-    n = len(A)
-    if n <= cutoff:
-        return matmul_classic(A, B)
-
-    m = n // 2
-
-    a11 = [row[:m] for row in A[:m]]
-    a12 = [row[m:] for row in A[:m]]
-    a21 = [row[:m] for row in A[m:]]
-    a22 = [row[m:] for row in A[m:]]
-
-    b11 = [row[:m] for row in B[:m]]
-    b12 = [row[m:] for row in B[:m]]
-    b21 = [row[:m] for row in B[m:]]
-    b22 = [row[m:] for row in B[m:]]
-
-    # Промежуточные суммы/разности S1..S10 (Виноград)
-    S1 = sub_matrix(b12, b22)
-    S2 = add_matrix(a11, a12)
-    S3 = add_matrix(a21, a22)
-    S4 = sub_matrix(b21, b11)
-    S5 = add_matrix(a11, a22)
-    S6 = add_matrix(b11, b22)
-    S7 = sub_matrix(a12, a22)
-    S8 = add_matrix(b21, b22)
-    S9 = sub_matrix(a11, a21)
-    S10 = add_matrix(b11, b12)
-
-    # 7 рекурсивных умножений P1..P7
-    P1 = _strassen_winograd_core(a11, S1, cutoff)
-    P2 = _strassen_winograd_core(S2, b22, cutoff)
-    P3 = _strassen_winograd_core(S3, b11, cutoff)
-    P4 = _strassen_winograd_core(a22, S4, cutoff)
-    P5 = _strassen_winograd_core(S5, S6, cutoff)
-    P6 = _strassen_winograd_core(S7, S8, cutoff)
-    P7 = _strassen_winograd_core(S9, S10, cutoff)
-
-    # Комбинация:
-    # C11 = P5 + P4 − P2 + P6
-    # C12 = P1 + P2
-    # C21 = P3 + P4
-    # C22 = P5 + P1 − P3 − P7
-    C11 = add_matrix(sub_matrix(add_matrix(P5, P4), P2), P6)
-    C12 = add_matrix(P1, P2)
-    C21 = add_matrix(P3, P4)
-    C22 = sub_matrix(sub_matrix(add_matrix(P5, P1), P3), P7)
-
-    C = [C11[i] + C12[i] for i in range(m)] + [C21[i] + C22[i] for i in range(m)]
-    return C
-
-
-def matmul_strassen_winograd(A: Matrix, B: Matrix, cutoff: int = CUTOFF_WINOGRAD) -> Matrix:
-    """Умножение матриц методом Штрассена–Винограда, поддерживает произвольное n (через доп. нули)."""
-    n = len(A)
-    if n == 0:
-        return []
-    assert n == len(B) == len(A[0]) == len(B[0]), "Матрицы должны быть квадратными и одинакового размера"
-
-    if n & (n - 1):
-        m = 1 << (n - 1).bit_length()
-        Ap = [row + [0] * (m - n) for row in A] + [[0] * m for _ in range(m - n)]
-        Bp = [row + [0] * (m - n) for row in B] + [[0] * m for _ in range(m - n)]
-        Cp = _strassen_winograd_core(Ap, Bp, cutoff)
-        return [row[:n] for row in Cp[:n]]
-    else:
-        return _strassen_winograd_core(A, B, cutoff)
-
-
-# =======================
-# Бенчмарк
-# =======================
-
-def time_algo(
-    fn: Callable[[Matrix, Matrix], Matrix],
-    matrices: Tuple[Tuple[Matrix, Matrix], ...]
-) -> list[float]:
-    """Замерить время работы fn на наборе матриц. Замеряем только fn, без генерации данных."""
-    times: list[float] = []
-    for A, B in matrices:
-        gc.collect()
-        gc.disable()
-        t0 = time.perf_counter()
-        _ = fn(A, B)
-        t1 = time.perf_counter()
-        gc.enable()
-        times.append(t1 - t0)
-    return times
-
-
-def run_benchmark() -> None:
-    n = N
-    print("=" * 60)
-    print(f"Benchmark: n = {n}, repeats = {NUM_REPEATS}, is_random = {IS_RANDOM}")
-    print(f"cutoff Strassen = {CUTOFF_STRASSEN}, cutoff Winograd = {CUTOFF_WINOGRAD}")
-    print("=" * 60)
-
-    # --- Генерация матриц для всех повторов ---
-    if IS_RANDOM:
-        matrices_list = []
-        for r in range(NUM_REPEATS):
-            seed_a = RANDOM_SEED + r
-            seed_b = RANDOM_SEED + 10_000 + r
-            A = generate_matrix(n, seed_a)
-            B = generate_matrix(n, seed_b)
-            matrices_list.append((A, B))
-    else:
-        A = generate_matrix(n, RANDOM_SEED)
-        B = generate_matrix(n, RANDOM_SEED + 10_000)
-        matrices_list = [(A, B)] * NUM_REPEATS
-
-    matrices_list = tuple(matrices_list)
-
-    # --- Корректность: сверяем Страссен и Виноград с классикой (на одном наборе) ---
-    A0_list, B0_list = matrices_list[0]
-
-    C_ref = matmul_classic(A0_list, B0_list)
-    C_strassen = matmul_strassen(A0_list, B0_list, cutoff=CUTOFF_STRASSEN)
-    C_winograd = matmul_strassen_winograd(A0_list, B0_list, cutoff=CUTOFF_WINOGRAD)
-
-    if C_strassen != C_ref:
-        raise AssertionError("Ошибка: результат Штрассена не совпадает с классическим O(n^3)")
-    if C_winograd != C_ref:
-        raise AssertionError("Ошибка: результат Штрассена–Винограда не совпадает с классическим O(n^3)")
-
-    print("Проверка корректности: OK (Strassen и Strassen–Winograd совпадают с классическим алгоритмом)")
-
-    # --- Замеры времени ---
-    times_classic = time_algo(matmul_classic, matrices_list)
-    times_str = time_algo(lambda X, Y: matmul_strassen(X, Y, cutoff=CUTOFF_STRASSEN), matrices_list)
-    times_win = time_algo(lambda X, Y: matmul_strassen_winograd(X, Y, cutoff=CUTOFF_WINOGRAD), matrices_list)
-
-    def report(name: str, times: list[float]) -> None:
-        avg = sum(times) / len(times)
-        mn = min(times)
-        mx = max(times)
-        sd = statistics.pstdev(times) if len(times) > 1 else 0.0
-        print(f"{name:18s}: avg={avg:.6f}s  min={mn:.6f}s  max={mx:.6f}s  std={sd:.6f}s")
-
-    print("\nРезультаты (чистое время умножения матриц):")
-    report("Classic O(n^3)", times_classic)
-    report("Strassen", times_str)
-    report("Strassen-Winograd", times_win)
-    print("=" * 60)
-
-
-if __name__ == "__main__":
-    run_benchmark()
+"""
+matrix_benchmark.py
+
+Бенчмарк умножения квадратных матриц тремя способами:
+
+1) Классический алгоритм (O(n^3)) — базовый эталон,
+   считается одним вызовом NumPy `A @ B` в int64
+   (целочисленный matmul в BLAS не диспетчеризуется,
+   работают внутренние циклы NumPy).
+
+2) Алгоритм Штрассена поверх NumPy
+   (7 рекурсивных умножений вместо 8,
+   ~18 блочных сложений/вычитаний на уровень рекурсии;
+   в базе рекурсии — листовое ядро: sgemm BLAS в режиме
+   float32, иначе C/Numba-ядра или int64-путь NumPy).
+
+3) Вариант Штрассена–Винограда поверх NumPy
+   (та же асимптотика, но меньше блочных сложений/вычитаний —
+   порядка 15 вместо ~18 на каждый уровень рекурсии).
+
+Скрипт:
+- генерирует матрицы A, B размерности N с элементами в [-9, 9];
+- измеряет только время одной операции умножения (без генерации/проверок);
+- считает статистики по NUM_REPEATS прогонкам;
+- проверяет корректность Штрассена и Штрассена–Винограда,
+  сравнивая результат с классическим O(n^3) алгоритмом (один раз, вне тайминга).
+"""
+
+from __future__ import annotations
+
+import ctypes
+import gc
+import math
+import os
+import statistics
+import subprocess
+import time
+from pathlib import Path
+from typing import List, Tuple, Callable
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+try:
+    import cupy as cp
+    HAS_CUPY = bool(cp.cuda.is_available())
+except ImportError:
+    HAS_CUPY = False
+
+# =======================
+# Константы эксперимента
+# =======================
+
+# Размерность матриц
+N: int = 384
+
+# Если True — на каждом повторе генерируются новые матрицы (случайные, но детерминированные через RANDOM_SEED).
+# Если False — генерируются один раз и переиспользуются во всех повторах.
+IS_RANDOM: bool = False
+
+# Сколько раз повторять измерение (усреднение)
+NUM_REPEATS: int = 1
+
+# Базовый сид для генерации
+RANDOM_SEED: int = 42
+
+# Считать рекурсию Штрассена в float32 вместо int64.
+# Для элементов из [-9, 9] и n=384 все промежуточные значения остаются
+# целыми и по модулю много меньше 2^24, то есть точно представимы в
+# мантиссе float32 — результат не меняется. Взамен BLAS получает
+# настоящий sgemm (а не целочисленный цикл NumPy), а трафик памяти
+# сокращается вдвое против int64. Ответ приводится обратно к int64.
+USE_FLOAT32: bool = True
+
+# Считать float32-лист C-ядром sgemm_leaf (ctypes, см. _leaf_kernel.c)
+# вместо NumPy `A @ B`. Полезно на сборках NumPy без BLAS; при штатном
+# OpenBLAS ручное микроядро проигрывает sgemm, поэтому по умолчанию
+# выключено.
+USE_C_SGEMM: bool = False
+
+# Ручные пороги переключения на базовое умножение внутри рекурсивных
+# алгоритмов; None — подобрать автоматически по размеру L2-кэша (см. ниже)
+CUTOFF_OVERRIDE: int | None = None
+
+
+def _detect_l2_bytes(default: int = 512 * 1024) -> int:
+    """Определить размер L2-кэша в байтах; при неудаче вернуть default."""
+    try:
+        size = os.sysconf("SC_LEVEL2_CACHE_SIZE")
+        if size > 0:
+            return size
+    except (ValueError, OSError, AttributeError):
+        pass
+    # Linux: sysfs, значения вида "512K" / "2048K" / "1M"
+    try:
+        with open("/sys/devices/system/cpu/cpu0/cache/index2/size") as f:
+            text = f.read().strip()
+        if text.endswith("K"):
+            return int(text[:-1]) * 1024
+        if text.endswith("M"):
+            return int(text[:-1]) * 1024 * 1024
+        return int(text)
+    except (OSError, ValueError):
+        pass
+    return default
+
+
+def _auto_cutoff() -> int:
+    """
+    Порог из критерия «рабочий набор листа помещается в L2»:
+    три блока m×m по 8 байт (A, B и результат) → m = sqrt(L2 / (3·8)).
+    """
+    return max(64, int(math.sqrt(_detect_l2_bytes() / (3 * 8))))
+
+
+CUTOFF_STRASSEN: int = CUTOFF_OVERRIDE if CUTOFF_OVERRIDE is not None else _auto_cutoff()
+CUTOFF_WINOGRAD: int = CUTOFF_STRASSEN
+
+# Уточнять порог эмпирически перед замерами: аналитическая модель кэша
+# нередко промахивается в 2 раза, пробный прогон — нет. Результат
+# кэшируется в ~/.cache/strassen_cutoff, поэтому подбор выполняется
+# один раз на машину и размерность. Ручной CUTOFF_OVERRIDE сильнее.
+AUTOTUNE_CUTOFF: bool = True
+
+# Кандидаты порога для эмпирического подбора
+_CUTOFF_CANDIDATES: Tuple[int, ...] = (64, 96, 128, 192, 256, 384)
+
+
+# =======================
+# Вспомогательные функции
+# =======================
+
+Matrix = List[List[int]]
+
+
+def generate_matrix(n: int, seed: int) -> np.ndarray:
+    """
+    Сгенерировать n×n матрицу с целыми элементами в диапазоне [-9, 9].
+
+    Один векторизованный вызов генератора NumPy вместо n² обращений к
+    random.randint: подготовка данных перестаёт быть заметной частью
+    запуска (для n=384 это ~147 тыс. вызовов на матрицу). int8 достаточно
+    для диапазона значений; алгоритмы сами повышают тип при конвертации.
+    """
+    rng = np.random.default_rng(seed)
+    return rng.integers(-9, 10, size=(n, n), dtype=np.int8)
+
+
+def matmul_classic(A: Matrix, B: Matrix) -> np.ndarray:
+    """
+    Классический O(n^3) алгоритм одним вызовом NumPy `A @ B` в int64.
+
+    Раньше здесь был тройной цикл (ikj-порядок) по спискам: каждая
+    операция умножить-сложить проходила через интерпретатор
+    (PyLong_Multiply/PyLong_Add, ~50 нс на операцию). Один вызов NumPy
+    выполняет те же 2·n^3 операций компилированными циклами. В BLAS
+    целочисленный matmul не попадает — sgemm используют только
+    float32-пути рекурсивных алгоритмов и GPU.
+
+    Используется:
+    - как эталон для проверки корректности,
+    - как отдельный алгоритм для сравнения по времени.
+    """
+    A = np.asarray(A, dtype=np.int64)
+    B = np.asarray(B, dtype=np.int64)
+    return A @ B
+
+
+def matmul_gpu(A: Matrix, B: Matrix) -> np.ndarray:
+    """
+    Умножение одним вызовом cuBLAS на GPU (CuPy), включая пересылки.
+
+    Считается в float32: для элементов из [-9, 9] и n=384 результат
+    не превышает 9·9·384 < 2^24, то есть целиком представим в мантиссе
+    float32 — ответ точный. cuBLAS sgemm на таких размерах опережает
+    любые CPU-варианты на порядки, поэтому рекурсия Штрассена на GPU
+    не нужна. Требует установленного CuPy и доступного устройства.
+    """
+    A32 = cp.asarray(np.asarray(A), dtype=cp.float32)
+    B32 = cp.asarray(np.asarray(B), dtype=cp.float32)
+    C = cp.asnumpy(A32 @ B32)
+    return C.astype(np.int64)
+
+
+class Scratch:
+    """
+    Пул временных квадратных буферов, сгруппированных по размеру.
+
+    Каждый уровень рекурсии Штрассена порождает десятки m×m временных
+    матриц (суммы блоков, M1..M7 / P1..P7, блоки результата), которые
+    раньше выделялись заново и сразу отправлялись в мусор. Пул выдаёт
+    уже выделенный буфер нужного размера и принимает его обратно после
+    последнего использования, убирая трафик malloc/free и давление на GC.
+    """
+
+    def __init__(self, dtype: np.dtype = np.int64) -> None:
+        self._dtype = dtype
+        self._pool: dict[int, list[np.ndarray]] = {}
+
+    def acquire(self, m: int) -> np.ndarray:
+        """Выдать свободный буфер m×m; при отсутствии — выделить новый."""
+        free = self._pool.get(m)
+        if free:
+            return free.pop()
+        return np.empty((m, m), dtype=self._dtype)
+
+    def release(self, *bufs: np.ndarray) -> None:
+        """Вернуть буферы в пул для переиспользования."""
+        for buf in bufs:
+            self._pool.setdefault(buf.shape[0], []).append(buf)
+
+
+# =======================
+# Ядро базового случая
+# =======================
+
+def _load_leaf_kernels():
+    """
+    Загрузить AVX2-ядра из _leaf_kernel.so (см. _leaf_kernel.c);
+    при отсутствии библиотеки — попытаться собрать её рядом с исходником.
+    Возвращает пару ctypes-функций (int16-ядро, sgemm-ядро) либо
+    (None, None), если библиотека недоступна.
+    """
+    here = Path(__file__).resolve().parent
+    src = here / "_leaf_kernel.c"
+    so = here / "_leaf_kernel.so"
+    if not src.exists():
+        return None, None
+    if not so.exists() or so.stat().st_mtime < src.stat().st_mtime:
+        try:
+            subprocess.run(
+                ["cc", "-O3", "-march=native", "-shared", "-fPIC",
+                 "-o", str(so), str(src)],
+                check=True, capture_output=True,
+            )
+        except (OSError, subprocess.CalledProcessError):
+            return None, None
+    try:
+        lib = ctypes.CDLL(str(so))
+    except OSError:
+        return None, None
+
+    i16 = lib.leaf_matmul_i16
+    i16.argtypes = [
+        np.ctypeslib.ndpointer(np.int16, flags="C_CONTIGUOUS"),
+        np.ctypeslib.ndpointer(np.int16, flags="C_CONTIGUOUS"),
+        np.ctypeslib.ndpointer(np.int32, flags="C_CONTIGUOUS"),
+        ctypes.c_int,
+    ]
+    i16.restype = None
+
+    sgemm = lib.sgemm_leaf
+    sgemm.argtypes = [
+        np.ctypeslib.ndpointer(np.float32, flags="C_CONTIGUOUS"),
+        np.ctypeslib.ndpointer(np.float32, flags="C_CONTIGUOUS"),
+        np.ctypeslib.ndpointer(np.float32, flags="C_CONTIGUOUS"),
+        ctypes.c_int,
+    ]
+    sgemm.restype = None
+    return i16, sgemm
+
+
+_LEAF_KERNEL, _SGEMM_KERNEL = _load_leaf_kernels()
+
+
+def _leaf_multiply_c(A: np.ndarray, B: np.ndarray) -> np.ndarray | None:
+    """
+    Умножение листа C-ядром (int16 + vpmaddwd), если значения позволяют.
+
+    Ядро точное, пока входы умещаются в int16, а скалярные произведения —
+    в int32; иначе возвращается None и лист считается int64-путём.
+    """
+    n = A.shape[0]
+    # Ядро рассчитано только на квадратные блоки n×n. Полосы k×1 и 1×k
+    # из _peel_odd сюда попадать не должны: leaf_matmul_i16 читал бы
+    # Bt как n×n мимо буфера. Без Numba их считает int64-путь NumPy.
+    if A.shape[1] != n or B.shape[1] != n:
+        return None
+    amax = int(np.abs(A).max()) if A.size else 0
+    bmax = int(np.abs(B).max()) if B.size else 0
+    if amax >= 2 ** 15 or bmax >= 2 ** 15 or amax * bmax * n >= 2 ** 31:
+        return None
+    A16 = np.ascontiguousarray(A, dtype=np.int16)
+    Bt16 = np.ascontiguousarray(B.T, dtype=np.int16)
+    C32 = np.empty((n, n), dtype=np.int32)
+    _LEAF_KERNEL(A16, Bt16, C32, n)
+    return C32.astype(np.int64)
+
+
+# Размер кэш-блока листового ядра: два тайла T×T int64 (блок B и блок C)
+# должны умещаться в L1 (32 КБ) → 2·T²·8 ≤ 32768 при T = 32
+_LEAF_TILE = 32
+
+if HAS_NUMBA:
+    @njit(parallel=True, fastmath=False, cache=True)
+    def _matmul_leaf(A: np.ndarray, B: np.ndarray, C: np.ndarray) -> None:
+        """
+        Скомпилированное блочное ikj-ядро для листа рекурсии (n <= cutoff).
+
+        prange по блокам строк даёт многопоточность, внутренний цикл по j
+        автовекторизуется LLVM (AVX2: 4 int64 за vpmullq/vpaddq).
+        Внешние циклы режут матрицы на тайлы T×T, чтобы рабочий набор
+        (тайл B и тайл C) жил в L1 и строка B[k] не перечитывалась из
+        памяти n раз. В отличие от BLAS, точная int64-арифметика
+        сохраняется.
+        """
+        n = A.shape[0]
+        T = _LEAF_TILE
+        for bi in prange((n + T - 1) // T):
+            ii = bi * T
+            i_hi = min(ii + T, n)
+            for kk in range(0, n, T):
+                k_hi = min(kk + T, n)
+                for jj in range(0, n, T):
+                    j_hi = min(jj + T, n)
+                    for i in range(ii, i_hi):
+                        for k in range(kk, k_hi):
+                            a = A[i, k]
+                            for j in range(jj, j_hi):
+                                C[i, j] += a * B[k, j]
+
+    @njit(parallel=True, fastmath=False, cache=True)
+    def _fused_leaf(A1: np.ndarray, A2: np.ndarray, sA: int,
+                    B1: np.ndarray, B2: np.ndarray, sB: int,
+                    C: np.ndarray) -> None:
+        """
+        Слитое ikj-ядро: C += (A1 + sA·A2) @ (B1 + sB·B2).
+
+        Суммы блоков Штрассена не материализуются в памяти — операнды
+        складываются в регистрах прямо в микроядре, так что каждый M_i/P_i
+        читает исходные блоки один раз вместо «записать темп, прочитать
+        темп». Знаки sA/sB из {-1, 0, 1}; при 0 второй операнд игнорируется
+        (передаётся тот же массив).
+        """
+        n = A1.shape[0]
+        for i in prange(n):
+            for k in range(n):
+                a = A1[i, k] + sA * A2[i, k]
+                for j in range(n):
+                    C[i, j] += a * (B1[k, j] + sB * B2[k, j])
+
+    @njit(cache=True)
+    def _gemv_leaf(A: np.ndarray, x: np.ndarray, y: np.ndarray) -> None:
+        """
+        y += A @ x: матрично-векторное ядро с четырьмя аккумуляторами.
+
+        Развёртка по глубине на 4 независимые суммы разрывает цепочку
+        зависимостей сложений и даёт планировщику заполнять FMA-порты;
+        хвост длины, не кратной 4, досчитывается скалярно.
+        """
+        n, m = A.shape
+        for i in range(n):
+            s0 = 0
+            s1 = 0
+            s2 = 0
+            s3 = 0
+            k = 0
+            while k + 4 <= m:
+                s0 += A[i, k] * x[k]
+                s1 += A[i, k + 1] * x[k + 1]
+                s2 += A[i, k + 2] * x[k + 2]
+                s3 += A[i, k + 3] * x[k + 3]
+                k += 4
+            s = s0 + s1 + s2 + s3
+            while k < m:
+                s += A[i, k] * x[k]
+                k += 1
+            y[i] += s
+
+    @njit(cache=True)
+    def _vecmat_leaf(x: np.ndarray, B: np.ndarray, y: np.ndarray) -> None:
+        """
+        y += x @ B: векторно-матричное ядро.
+
+        Накопление идёт строками B (последовательная память), внутренний
+        цикл по j автовекторизуется.
+        """
+        m, n = B.shape
+        for k in range(m):
+            a = x[k]
+            for j in range(n):
+                y[j] += a * B[k, j]
+
+    # Прогрев при импорте: JIT-компиляция не должна попадать в замеры
+    _warm = np.zeros((2, 2), dtype=np.int64)
+    _warm_v = np.zeros(2, dtype=np.int64)
+    _matmul_leaf(_warm, _warm, np.zeros((2, 2), dtype=np.int64))
+    _fused_leaf(_warm, _warm, 1, _warm, _warm, 1, np.zeros((2, 2), dtype=np.int64))
+    _gemv_leaf(_warm, _warm_v, np.zeros(2, dtype=np.int64))
+    _vecmat_leaf(_warm_v, _warm, np.zeros(2, dtype=np.int64))
+    del _warm, _warm_v
+
+
+def _leaf_multiply(A: np.ndarray, B: np.ndarray) -> np.ndarray:
+    """
+    Умножение листового блока: для float32 — сразу BLAS (sgemm);
+    для int64 — C-ядро (AVX2, int16), если значения позволяют,
+    затем Numba-ядро и в самом конце целочисленный путь NumPy.
+    Вырожденные формы (одна строка или один столбец результата)
+    уходят в отдельные gemv-ядра, минуя матричные пути.
+    """
+    if HAS_NUMBA and A.shape[0] == 1:
+        y = np.zeros(B.shape[1], dtype=A.dtype)
+        _vecmat_leaf(A[0], B, y)
+        return y.reshape(1, -1)
+    if HAS_NUMBA and B.shape[1] == 1:
+        y = np.zeros(A.shape[0], dtype=A.dtype)
+        _gemv_leaf(A, B[:, 0], y)
+        return y.reshape(-1, 1)
+    if A.dtype != np.int64:
+        # sgemm_leaf считает только квадратные n×n блоки: полосы 1×k и
+        # k×1 из _peel_odd (в т.ч. скалярное 1×k @ k×1, где крайние
+        # размеры совпадают) обязаны уходить в NumPy `A @ B`
+        if (USE_C_SGEMM and _SGEMM_KERNEL is not None
+                and A.dtype == np.float32
+                and A.shape[0] == A.shape[1] == B.shape[1]):
+            n = A.shape[0]
+            Ac = np.ascontiguousarray(A)
+            Bc = np.ascontiguousarray(B)
+            C = np.empty((n, n), dtype=np.float32)
+            _SGEMM_KERNEL(Ac, Bc, C, n)
+            return C
+        return A @ B
+    if _LEAF_KERNEL is not None:
+        C = _leaf_multiply_c(A, B)
+        if C is not None:
+            return C
+    if HAS_NUMBA:
+        C = np.zeros((A.shape[0], B.shape[1]), dtype=np.int64)
+        _matmul_leaf(A, B, C)
+        return C
+    return A @ B
+
+
+def _leaf_multiply_fused(A1: np.ndarray, A2: np.ndarray, sA: int,
+                         B1: np.ndarray, B2: np.ndarray, sB: int) -> np.ndarray:
+    """
+    (A1 + sA·A2) @ (B1 + sB·B2) для листа рекурсии.
+
+    С Numba суммы сворачиваются в микроядро и не записываются в память.
+    Если доступно C-ядро (AVX2) или лист считается в float32 (sgemm),
+    само умножение выигрывает больше, чем экономия на материализации
+    сумм, поэтому суммы считаются за O(n^2) и лист идёт обычным путём;
+    так же — без Numba.
+    """
+    if HAS_NUMBA and _LEAF_KERNEL is None and A1.dtype == np.int64:
+        C = np.zeros((A1.shape[0], B1.shape[1]), dtype=np.int64)
+        _fused_leaf(A1, A2, sA, B1, B2, sB, C)
+        return C
+    A = A1 if sA == 0 else A1 + sA * A2
+    B = B1 if sB == 0 else B1 + sB * B2
+    return _leaf_multiply(A, B)
+
+
+def _pack_quadrants(X: np.ndarray, m: int, scratch: Scratch) -> tuple:
+    """
+    Упаковать четыре блока m×m матрицы X в непрерывные буферы из пула.
+
+    Срезы-представления наследуют страйд родителя, и глубже по рекурсии
+    каждый проход по блоку B прыгает через всю строку исходной матрицы,
+    нагружая TLB и заполнение L2. Однократная упаковка на уровне делает
+    блоки C-непрерывными для всех семи умножений, которые их читают.
+    """
+    x11 = scratch.acquire(m)
+    x12 = scratch.acquire(m)
+    x21 = scratch.acquire(m)
+    x22 = scratch.acquire(m)
+    np.copyto(x11, X[:m, :m])
+    np.copyto(x12, X[:m, m:])
+    np.copyto(x21, X[m:, :m])
+    np.copyto(x22, X[m:, m:])
+    return x11, x12, x21, x22
+
+
+def _peel_odd(A: np.ndarray, B: np.ndarray, core, cutoff: int, scratch: Scratch) -> np.ndarray:
+    """
+    Умножение при нечётном n: отщепление крайних строки и столбца.
+
+    Вместо дополнения нулями до степени двойки (до 4× лишней работы на
+    размерах чуть выше 2^k) матрицы режутся как n = k + 1:
+
+        C00 = A00·B00 + a01·b10     (k×k, рекурсия + внешнее произведение)
+        C01 = A00·b01 + a01·b11     (k×1, gemv)
+        C10 = a10·B00 + a11·b10     (1×k, vec-mat)
+        C11 = a10·b01 + a11·b11     (скаляр)
+
+    Рекурсивная часть остаётся размера k (чётного), а весь довесок —
+    O(n^2) работы в векторных ядрах.
+    """
+    n = A.shape[0]
+    k = n - 1
+
+    A00 = A[:k, :k]
+    a01 = A[:k, k:]
+    a10 = A[k:, :k]
+    a11 = A[k, k]
+
+    B00 = B[:k, :k]
+    b01 = B[:k, k:]
+    b10 = B[k:, :k]
+    b11 = B[k, k]
+
+    C = np.empty((n, n), dtype=A.dtype)
+    C[:k, :k] = core(A00, B00, cutoff, scratch)
+    C[:k, :k] += a01 * b10                      # внешнее произведение
+    C[:k, k:] = _leaf_multiply(A00, b01) + a01 * b11
+    C[k:, :k] = _leaf_multiply(a10, B00) + a11 * b10
+    C[k, k] = _leaf_multiply(a10, b01)[0, 0] + a11 * b11
+    return C
+
+
+# =======================
+# Алгоритм Штрассена
+# =======================
+
+def _strassen_core(A: np.ndarray, B: np.ndarray, cutoff: int, scratch: Scratch) -> np.ndarray:
+    n = A.shape[0]
+    if n <= cutoff:
+        return _leaf_multiply(A, B)
+
+    if n % 2:
+        # Нечётный размер: отщепляем крайние строку и столбец
+        return _peel_odd(A, B, _strassen_core, cutoff, scratch)
+
+    m = n // 2
+
+    # Блоки — срезы ndarray, т.е. представления без копирования
+    a11 = A[:m, :m]
+    a12 = A[:m, m:]
+    a21 = A[m:, :m]
+    a22 = A[m:, m:]
+
+    b11 = B[:m, :m]
+    b12 = B[:m, m:]
+    b21 = B[m:, :m]
+    b22 = B[m:, m:]
+
+    # 7 рекурсивных умножений (M1..M7)
+    if m <= cutoff:
+        # Блоки уходят прямо в лист — суммы сворачиваются в микроядро
+        # и не материализуются в памяти
+        M1 = _leaf_multiply_fused(a11, a22, 1, b11, b22, 1)
+        M2 = _leaf_multiply_fused(a21, a22, 1, b11, b11, 0)
+        M3 = _leaf_multiply_fused(a11, a11, 0, b12, b22, -1)
+        M4 = _leaf_multiply_fused(a22, a22, 0, b21, b11, -1)
+        M5 = _leaf_multiply_fused(a11, a12, 1, b22, b22, 0)
+        M6 = _leaf_multiply_fused(a21, a11, -1, b11, b12, 1)
+        M7 = _leaf_multiply_fused(a12, a22, -1, b21, b22, 1)
+    else:
+        # Блоки B упаковываются в непрерывные буферы один раз на уровень;
+        # суммы блоков пишутся в пару буферов из пула
+        # и возвращаются сразу после вызова
+        b11, b12, b21, b22 = _pack_quadrants(B, m, scratch)
+        T1 = scratch.acquire(m)
+        T2 = scratch.acquire(m)
+
+        np.add(a11, a22, out=T1)
+        np.add(b11, b22, out=T2)
+        M1 = _strassen_core(T1, T2, cutoff, scratch)
+
+        np.add(a21, a22, out=T1)
+        M2 = _strassen_core(T1, b11, cutoff, scratch)
+
+        np.subtract(b12, b22, out=T2)
+        M3 = _strassen_core(a11, T2, cutoff, scratch)
+
+        np.subtract(b21, b11, out=T2)
+        M4 = _strassen_core(a22, T2, cutoff, scratch)
+
+        np.add(a11, a12, out=T1)
+        M5 = _strassen_core(T1, b22, cutoff, scratch)
+
+        np.subtract(a21, a11, out=T1)
+        np.add(b11, b12, out=T2)
+        M6 = _strassen_core(T1, T2, cutoff, scratch)
+
+        np.subtract(a12, a22, out=T1)
+        np.add(b21, b22, out=T2)
+        M7 = _strassen_core(T1, T2, cutoff, scratch)
+
+        scratch.release(T1, T2, b11, b12, b21, b22)
+
+    # Комбинация в блоки C11..C22 (классические формулы Штрассена).
+    # Блоки — представления заранее выделенного результата: суммы
+    # пишутся в них по месту, без временных матриц и финальной склейки.
+    C = np.empty((n, n), dtype=A.dtype)
+    c11 = C[:m, :m]
+    c12 = C[:m, m:]
+    c21 = C[m:, :m]
+    c22 = C[m:, m:]
+
+    np.add(M1, M4, out=c11)
+    c11 += M7
+    c11 -= M5
+
+    np.add(M3, M5, out=c12)
+    np.add(M2, M4, out=c21)
+
+    np.add(M1, M3, out=c22)
+    c22 -= M2
+    c22 += M6
+
+    # M1..M7 больше не нужны — отдаём их пулу для соседних поддеревьев
+    scratch.release(M1, M2, M3, M4, M5, M6, M7)
+
+    return C
+
+
+def matmul_strassen(A: Matrix, B: Matrix, cutoff: int = CUTOFF_STRASSEN) -> np.ndarray:
+    """Умножение матриц методом Штрассена; нечётные размеры обрабатываются отщеплением края."""
+    n = len(A)
+    if n == 0:
+        return np.zeros((0, 0), dtype=np.int64)
+
+    # Однократная конвертация входа в ndarray рабочего типа; дальше вся
+    # рекурсия работает с представлениями и массивами NumPy
+    dtype = np.float32 if USE_FLOAT32 else np.int64
+    A = np.asarray(A, dtype=dtype)
+    B = np.asarray(B, dtype=dtype)
+    assert A.shape == B.shape == (n, n), "Матрицы должны быть квадратными и одинакового размера"
+
+    C = _strassen_core(A, B, cutoff, Scratch(dtype))
+    # Значения точные и целые — приведение к int64 без потерь
+    return C.astype(np.int64) if USE_FLOAT32 else C
+
+
+# =======================
+# Алгоритм Штрассена–Винограда
+# (формулы с S1..S10, P1..P7)
+# =======================
+
+def _strassen_winograd_core(A: np.ndarray, B: np.ndarray, cutoff: int, scratch: Scratch) -> np.ndarray:
+    n = A.shape[0]
+    if n <= cutoff:
+        return _leaf_multiply(A, B)
+
+    if n % 2:
+        # Нечётный размер: отщепляем крайние строку и столбец
+        return _peel_odd(A, B, _strassen_winograd_core, cutoff, scratch)
+
+    m = n // 2
+
+    # Блоки — срезы ndarray, т.е. представления без копирования
+    a11 = A[:m, :m]
+    a12 = A[:m, m:]
+    a21 = A[m:, :m]
+    a22 = A[m:, m:]
+
+    b11 = B[:m, :m]
+    b12 = B[:m, m:]
+    b21 = B[m:, :m]
+    b22 = B[m:, m:]
+
+    # Суммы/разности S1..S10 (Виноград) и 7 рекурсивных умножений P1..P7
+    if m <= cutoff:
+        # Блоки уходят прямо в лист — S-матрицы сворачиваются
+        # в микроядро и не материализуются в памяти
+        P1 = _leaf_multiply_fused(a11, a11, 0, b12, b22, -1)
+        P2 = _leaf_multiply_fused(a11, a12, 1, b22, b22, 0)
+        P3 = _leaf_multiply_fused(a21, a22, 1, b11, b11, 0)
+        P4 = _leaf_multiply_fused(a22, a22, 0, b21, b11, -1)
+        P5 = _leaf_multiply_fused(a11, a22, 1, b11, b22, 1)
+        P6 = _leaf_multiply_fused(a12, a22, -1, b21, b22, 1)
+        P7 = _leaf_multiply_fused(a11, a21, -1, b11, b12, 1)
+    else:
+        # Блоки B упаковываются в непрерывные буферы один раз на уровень.
+        # Каждая S-матрица потребляется ровно одним P-вызовом,
+        # поэтому все десять умещаются в два буфера из пула
+        b11, b12, b21, b22 = _pack_quadrants(B, m, scratch)
+        T1 = scratch.acquire(m)
+        T2 = scratch.acquire(m)
+
+        np.subtract(b12, b22, out=T2)                             # S1
+        P1 = _strassen_winograd_core(a11, T2, cutoff, scratch)
+
+        np.add(a11, a12, out=T1)                                  # S2
+        P2 = _strassen_winograd_core(T1, b22, cutoff, scratch)
+
+        np.add(a21, a22, out=T1)                                  # S3
+        P3 = _strassen_winograd_core(T1, b11, cutoff, scratch)
+
+        np.subtract(b21, b11, out=T2)                             # S4
+        P4 = _strassen_winograd_core(a22, T2, cutoff, scratch)
+
+        np.add(a11, a22, out=T1)                                  # S5
+        np.add(b11, b22, out=T2)                                  # S6
+        P5 = _strassen_winograd_core(T1, T2, cutoff, scratch)
+
+        np.subtract(a12, a22, out=T1)                             # S7
+        np.add(b21, b22, out=T2)                                  # S8
+        P6 = _strassen_winograd_core(T1, T2, cutoff, scratch)
+
+        np.subtract(a11, a21, out=T1)                             # S9
+        np.add(b11, b12, out=T2)                                  # S10
+        P7 = _strassen_winograd_core(T1, T2, cutoff, scratch)
+
+        scratch.release(T1, T2, b11, b12, b21, b22)
+
+    # Комбинация:
+    # C11 = P5 + P4 − P2 + P6
+    # C12 = P1 + P2
+    # C21 = P3 + P4
+    # C22 = P5 + P1 − P3 − P7
+    # Блоки — представления заранее выделенного результата: суммы
+    # пишутся в них по месту, без временных матриц и финальной склейки.
+    C = np.empty((n, n), dtype=A.dtype)
+    C11 = C[:m, :m]
+    C12 = C[:m, m:]
+    C21 = C[m:, :m]
+    C22 = C[m:, m:]
+
+    # Четырёхчленные суммы накапливаются в непрерывном буфере из пула
+    # и одним проходом записываются в блок результата: проходы по
+    # непрерывному t дешевле, чем по страйдовому представлению C
+    t = scratch.acquire(m)
+
+    np.add(P5, P4, out=t)
+    t += P6
+    np.subtract(t, P2, out=C11)
+
+    np.add(P5, P1, out=t)
+    t -= P3
+    np.subtract(t, P7, out=C22)
+
+    scratch.release(t)
+
+    np.add(P1, P2, out=C12)
+    np.add(P3, P4, out=C21)
+
+    scratch.release(P1, P2, P3, P4, P5, P6, P7)
+
+    return C
+
+
+def matmul_strassen_winograd(A: Matrix, B: Matrix, cutoff: int = CUTOFF_WINOGRAD) -> np.ndarray:
+    """Умножение матриц методом Штрассена–Винограда; нечётные размеры обрабатываются отщеплением края."""
+    n = len(A)
+    if n == 0:
+        return np.zeros((0, 0), dtype=np.int64)
+
+    dtype = np.float32 if USE_FLOAT32 else np.int64
+    A = np.asarray(A, dtype=dtype)
+    B = np.asarray(B, dtype=dtype)
+    assert A.shape == B.shape == (n, n), "Матрицы должны быть квадратными и одинакового размера"
+
+    C = _strassen_winograd_core(A, B, cutoff, Scratch(dtype))
+    # Значения точные и целые — приведение к int64 без потерь
+    return C.astype(np.int64) if USE_FLOAT32 else C
+
+
+# =======================
+# Специализация под фиксированный размер (кодогенерация)
+# =======================
+
+# Кэш сгенерированных функций по паре (n, cutoff)
+_SPECIALIZED: dict = {}
+
+
+def _emit_strassen(lines: list, a: str, b: str, n: int, cutoff: int, prefix: str) -> str:
+    """
+    Рекурсивно выписать в lines линейный код произведения {a}·{b} (n×n)
+    и вернуть имя переменной с результатом.
+
+    Все размеры и смещения срезов — константы-литералы: в готовой
+    функции нет ни проверок n, ни рекурсивных вызовов — только срезы,
+    арифметика блоков и листовые умножения.
+    """
+    if n <= cutoff or n % 2:
+        lines.append(f"{prefix}r = _leaf_multiply({a}, {b})")
+        return f"{prefix}r"
+
+    m = n // 2
+    p = prefix
+    for name, src, rows, cols in (
+        ("a11", a, f":{m}", f":{m}"), ("a12", a, f":{m}", f"{m}:"),
+        ("a21", a, f"{m}:", f":{m}"), ("a22", a, f"{m}:", f"{m}:"),
+        ("b11", b, f":{m}", f":{m}"), ("b12", b, f":{m}", f"{m}:"),
+        ("b21", b, f"{m}:", f":{m}"), ("b22", b, f"{m}:", f"{m}:"),
+    ):
+        lines.append(f"{p}{name} = {src}[{rows}, {cols}]")
+
+    terms = (
+        (f"{p}a11 + {p}a22", f"{p}b11 + {p}b22"),
+        (f"{p}a21 + {p}a22", f"{p}b11"),
+        (f"{p}a11", f"{p}b12 - {p}b22"),
+        (f"{p}a22", f"{p}b21 - {p}b11"),
+        (f"{p}a11 + {p}a12", f"{p}b22"),
+        (f"{p}a21 - {p}a11", f"{p}b11 + {p}b12"),
+        (f"{p}a12 - {p}a22", f"{p}b21 + {p}b22"),
+    )
+    Ms = []
+    for i, (ta, tb) in enumerate(terms, start=1):
+        lines.append(f"{p}l{i} = {ta}")
+        lines.append(f"{p}r{i} = {tb}")
+        Ms.append(_emit_strassen(lines, f"{p}l{i}", f"{p}r{i}", m, cutoff, f"{p}m{i}_"))
+
+    M1, M2, M3, M4, M5, M6, M7 = Ms
+    lines.append(f"{p}C = np.empty(({n}, {n}), dtype={a}.dtype)")
+    lines.append(f"{p}C[:{m}, :{m}] = {M1} + {M4} + {M7} - {M5}")
+    lines.append(f"{p}C[:{m}, {m}:] = {M3} + {M5}")
+    lines.append(f"{p}C[{m}:, :{m}] = {M2} + {M4}")
+    lines.append(f"{p}C[{m}:, {m}:] = {M1} + {M3} - {M2} + {M6}")
+    return f"{p}C"
+
+
+def specialize_strassen(n: int, cutoff: int) -> Callable[[Matrix, Matrix], np.ndarray]:
+    """
+    Сгенерировать умножение Штрассена, развёрнутое под фиксированные
+    (n, cutoff): дерево рекурсии раскрыто в прямолинейный Python с
+    константными срезами — без проверок размеров, диспетчеризации и
+    накладных расходов на вызов на каждом уровне. Скомпилированные
+    функции кэшируются по паре (n, cutoff).
+    """
+    key = (n, cutoff)
+    fn = _SPECIALIZED.get(key)
+    if fn is not None:
+        return fn
+
+    lines: list = []
+    result = _emit_strassen(lines, "A", "B", n, cutoff, "v_")
+    body = "\n    ".join(lines)
+    src = (
+        f"def _strassen_{n}_{cutoff}(A, B):\n"
+        f"    {body}\n"
+        f"    return {result}\n"
+    )
+    namespace = {"np": np, "_leaf_multiply": _leaf_multiply}
+    exec(compile(src, f"<strassen_{n}_{cutoff}>", "exec"), namespace)
+    core = namespace[f"_strassen_{n}_{cutoff}"]
+
+    def fn(A: Matrix, B: Matrix) -> np.ndarray:
+        dtype = np.float32 if USE_FLOAT32 else np.int64
+        C = core(np.asarray(A, dtype=dtype), np.asarray(B, dtype=dtype))
+        return C.astype(np.int64) if USE_FLOAT32 else C
+
+    _SPECIALIZED[key] = fn
+    return fn
+
+
+# =======================
+# Бенчмарк
+# =======================
+
+def time_algo(
+    fn: Callable[[Matrix, Matrix], np.ndarray],
+    matrices: Tuple[Tuple[Matrix, Matrix], ...]
+) -> list[float]:
+    """
+    Замерить время работы fn на наборе матриц. Замеряем только fn, без генерации данных.
+
+    Сборщик мусора остаётся включённым: отключение на время прогона лишь
+    копит неотслеженный мусор и переносит его стоимость в случайный
+    момент после gc.enable(), искажая разброс между повторами. Вместо
+    этого долгоживущие объекты замораживаются (gc.freeze), чтобы
+    коллектор их не сканировал, а между повторами куча приводится
+    в одинаковое состояние явным gc.collect().
+    """
+    times: list[float] = []
+    gc.collect()
+    gc.collect()
+    gc.freeze()
+    try:
+        for A, B in matrices:
+            t0 = time.perf_counter()
+            _ = fn(A, B)
+            t1 = time.perf_counter()
+            times.append(t1 - t0)
+            gc.collect()
+    finally:
+        gc.unfreeze()
+    return times
+
+
+def _autotune_cutoff(n: int) -> int:
+    """
+    Эмпирический подбор порога рекурсии для матриц n×n.
+
+    Замеряет matmul_strassen на пробной паре матриц для каждого
+    кандидата из _CUTOFF_CANDIDATES и возвращает самый быстрый;
+    ответ кэшируется в ~/.cache/strassen_cutoff строками «n cutoff»,
+    чтобы пробные прогоны не повторялись при каждом запуске.
+    """
+    cache = Path.home() / ".cache" / "strassen_cutoff"
+    try:
+        for line in cache.read_text().splitlines():
+            parts = line.split()
+            if len(parts) == 2 and parts[0] == str(n):
+                return int(parts[1])
+    except OSError:
+        pass
+
+    A = generate_matrix(n, RANDOM_SEED)
+    B = generate_matrix(n, RANDOM_SEED + 10_000)
+    best_c = CUTOFF_STRASSEN
+    best_t = math.inf
+    for c in _CUTOFF_CANDIDATES:
+        if c > n:
+            continue
+        matmul_strassen(A, B, cutoff=c)  # прогрев
+        t = math.inf
+        for _ in range(2):
+            t0 = time.perf_counter()
+            matmul_strassen(A, B, cutoff=c)
+            t = min(t, time.perf_counter() - t0)
+        if t < best_t:
+            best_t = t
+            best_c = c
+
+    try:
+        cache.parent.mkdir(parents=True, exist_ok=True)
+        with cache.open("a") as f:
+            f.write(f"{n} {best_c}\n")
+    except OSError:
+        pass
+    return best_c
+
+
+def _check_leaf_paths() -> None:
+    """
+    Регрессионная проверка листовых путей на нечётных размерах.
+
+    Полосы k×1 и 1×k из _peel_odd не должны попадать в квадратные
+    C-ядра (sgemm_leaf и int16-ядро считают, что у блока один размер
+    на всех). При установленной Numba эти ветки маскируются
+    gemv-диспетчеризацией, поэтому на время проверки она отключается,
+    а оба режима (int64 и float32 c sgemm_leaf, если ядро собрано)
+    прогоняются явно.
+    """
+    global HAS_NUMBA, USE_FLOAT32, USE_C_SGEMM
+    saved = (HAS_NUMBA, USE_FLOAT32, USE_C_SGEMM)
+    HAS_NUMBA = False
+    try:
+        for USE_FLOAT32 in (False, True):
+            USE_C_SGEMM = USE_FLOAT32 and _SGEMM_KERNEL is not None
+            for n in (5, 33, 97):
+                A = generate_matrix(n, seed=n)
+                B = generate_matrix(n, seed=n + 1)
+                if not np.array_equal(matmul_strassen(A, B, cutoff=4),
+                                      matmul_classic(A, B)):
+                    mode = "float32" if USE_FLOAT32 else "int64"
+                    raise AssertionError(
+                        f"Ошибка: листовые пути без Numba дают неверный "
+                        f"результат при n = {n} ({mode})")
+    finally:
+        HAS_NUMBA, USE_FLOAT32, USE_C_SGEMM = saved
+
+
+def run_benchmark() -> None:
+    global CUTOFF_STRASSEN, CUTOFF_WINOGRAD
+
+    _check_leaf_paths()
+
+    n = N
+    if AUTOTUNE_CUTOFF and CUTOFF_OVERRIDE is None:
+        CUTOFF_STRASSEN = _autotune_cutoff(n)
+        CUTOFF_WINOGRAD = CUTOFF_STRASSEN
+
+    print("=" * 60)
+    print(f"Benchmark: n = {n}, repeats = {NUM_REPEATS}, is_random = {IS_RANDOM}")
+    print(f"cutoff Strassen = {CUTOFF_STRASSEN}, cutoff Winograd = {CUTOFF_WINOGRAD}")
+    print("=" * 60)
+
+    # --- Генерация матриц для всех повторов ---
+    if IS_RANDOM:
+        matrices_list = []
+        for r in range(NUM_REPEATS):
+            seed_a = RANDOM_SEED + r
+            seed_b = RANDOM_SEED + 10_000 + r
+            A = generate_matrix(n, seed_a)
+            B = generate_matrix(n, seed_b)
+            matrices_list.append((A, B))
+    else:
+        A = generate_matrix(n, RANDOM_SEED)
+        B = generate_matrix(n, RANDOM_SEED + 10_000)
+        matrices_list = [(A, B)] * NUM_REPEATS
+
+    matrices_list = tuple(matrices_list)
+
+    # --- Корректность: сверяем Страссен и Виноград с классикой (на одном наборе) ---
+    A0_list, B0_list = matrices_list[0]
+
+    C_ref = matmul_classic(A0_list, B0_list)
+    C_strassen = matmul_strassen(A0_list, B0_list, cutoff=CUTOFF_STRASSEN)
+    C_winograd = matmul_strassen_winograd(A0_list, B0_list, cutoff=CUTOFF_WINOGRAD)
+    strassen_spec = specialize_strassen(n, CUTOFF_STRASSEN)
+    C_spec = strassen_spec(A0_list, B0_list)
+
+    if not np.array_equal(C_strassen, C_ref):
+        raise AssertionError("Ошибка: результат Штрассена не совпадает с классическим O(n^3)")
+    if not np.array_equal(C_winograd, C_ref):
+        raise AssertionError("Ошибка: результат Штрассена–Винограда не совпадает с классическим O(n^3)")
+    if not np.array_equal(C_spec, C_ref):
+        raise AssertionError("Ошибка: результат специализированного Штрассена не совпадает с классическим O(n^3)")
+    if HAS_CUPY:
+        C_gpu = matmul_gpu(A0_list, B0_list)
+        if not np.array_equal(C_gpu, C_ref):
+            raise AssertionError("Ошибка: результат GPU (cuBLAS) не совпадает с классическим O(n^3)")
+
+    print("Проверка корректности: OK (Strassen и Strassen–Winograd совпадают с классическим алгоритмом)")
+
+    # --- Замеры времени ---
+    times_classic = time_algo(matmul_classic, matrices_list)
+    times_str = time_algo(lambda X, Y: matmul_strassen(X, Y, cutoff=CUTOFF_STRASSEN), matrices_list)
+    times_win = time_algo(lambda X, Y: matmul_strassen_winograd(X, Y, cutoff=CUTOFF_WINOGRAD), matrices_list)
+    times_spec = time_algo(strassen_spec, matrices_list)
+
+    def report(name: str, times: list[float]) -> None:
+        avg = sum(times) / len(times)
+        mn = min(times)
+        mx = max(times)
+        sd = statistics.pstdev(times) if len(times) > 1 else 0.0
+        print(f"{name:18s}: avg={avg:.6f}s  min={mn:.6f}s  max={mx:.6f}s  std={sd:.6f}s")
+
+    print("\nРезультаты (чистое время умножения матриц):")
+    report("Classic O(n^3)", times_classic)
+    report("Strassen", times_str)
+    report("Strassen-Winograd", times_win)
+    report("Strassen (codegen)", times_spec)
+    if HAS_CUPY:
+        # Контекст CUDA уже прогрет проверкой корректности выше
+        times_gpu = time_algo(matmul_gpu, matrices_list)
+        report("GPU (cuBLAS)", times_gpu)
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,9 @@
+"""Сборка Cython-ядра для answer.py: python setup.py build_ext --inplace"""
+
+from setuptools import setup
+from Cython.Build import cythonize
+
+setup(
+    name="matmul_cython",
+    ext_modules=cythonize("_matmul_cython.pyx", language_level=3),
+)